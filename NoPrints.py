@@ -23,6 +23,15 @@ from smart_paste import SmartPaste
 from history_window import HistoryWindow
 from logo_handler import get_menu_bar_icons
 
+# Hidden unicode characters (from original functionality), with the
+# control characters written as a range rather than one entry each;
+# '\n' is kept so clean_text preserves line breaks
+_HIDDEN_RE = re.compile(
+    '[\u200b-\u200f\u202a-\u202e\u2060-\u2064\u2066-\u2069'
+    '\ufeff\ufffc\ufffd\x00-\x09\x0b-\x1f\x7f]'
+)
+_WS_SUB = re.compile(r'\s+').sub
+
 class NoPrints(rumps.App):
     def __init__(self):
         super(NoPrints, self).__init__("🔒", quit_button=None)
@@ -54,17 +63,6 @@ class NoPrints(rumps.App):
         if self.enabled is None:
             self.enabled = True
         
-        # Hidden unicode characters (from original functionality)
-        self.hidden_chars = [
-            '\u200b', '\u200c', '\u200d', '\u200e', '\u200f',
-            '\u202a', '\u202b', '\u202c', '\u202d', '\u202e',
-            '\u2060', '\u2061', '\u2062', '\u2063', '\u2064',
-            '\u2066', '\u2067', '\u2068', '\u2069',
-            '\ufeff', '\ufffc', '\ufffd', '\u0000'
-        ] + [chr(i) for i in range(0x01, 0x20)] + ['\u007f']
-        
-        self.hidden_pattern = re.compile('[' + ''.join(self.hidden_chars) + ']')
-        
         # Setup menu
         self.setup_menu()
         
@@ -564,6 +562,7 @@ class NoPrints(rumps.App):
     def clear_sensitive_data(self, sender):
         """Clear all sensitive clipboard data"""
         self.history.clear_sensitive()
+        self.security.clear_cache()
         self.update_recent_menu()
         self.update_bitcoin_menu()
         self.update_security_status()
@@ -583,6 +582,7 @@ class NoPrints(rumps.App):
         
         # Clear all clipboard history
         self.history.clear_all()
+        self.security.clear_cache()
         
         # Reset all statistics
         self.cleaned_count = 0
@@ -664,6 +664,7 @@ class NoPrints(rumps.App):
     
     def quit_app(self, sender):
         """Quit application"""
+        self.history.flush()
         rumps.quit_application()
     
     def clean_text(self, text):
@@ -672,15 +673,23 @@ class NoPrints(rumps.App):
             return text
         
         text = unicodedata.normalize('NFC', text)
-        text = self.hidden_pattern.sub('', text)
-        
-        # Additional cleaning
-        text = re.sub(r'\s+', ' ', text)
-        lines = text.split('\n')
-        lines = [line.rstrip() for line in lines]
-        text = '\n'.join(lines)
+        text = _HIDDEN_RE.sub('', text)
+        
+        # Additional cleaning: collapse whitespace within each line and
+        # allow at most one blank line in a row
+        lines = []
+        blank_run = 0
+        for line in text.split('\n'):
+            line = _WS_SUB(' ', line).rstrip()
+            if line:
+                blank_run = 0
+            else:
+                blank_run += 1
+                if blank_run > 1:
+                    continue
+            lines.append(line)
         
-        return text
+        return '\n'.join(lines)
     
     def get_clipboard_content(self):
         """Get clipboard content if changed"""
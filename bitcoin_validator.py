@@ -6,25 +6,29 @@ Bitcoin address validation and detection module
 import re
 import hashlib
 
+# Every token pattern starts with one of these characters, except
+# lightning addresses which always contain '@'
+_TOKEN_FIRST_CHARS = frozenset('123mnbtlLKx5')
+
 class BitcoinValidator:
+    # Bitcoin address patterns
+    patterns = {
+        'legacy': re.compile(r'^[1][a-km-zA-HJ-NP-Z1-9]{25,34}$'),
+        'segwit_p2sh': re.compile(r'^[3][a-km-zA-HJ-NP-Z1-9]{25,34}$'),
+        'bech32': re.compile(r'^bc1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{6,87}$'),
+        'taproot': re.compile(r'^bc1p[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{58}$'),
+        'testnet_legacy': re.compile(r'^[mn2][a-km-zA-HJ-NP-Z1-9]{25,34}$'),
+        'testnet_bech32': re.compile(r'^tb1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{6,87}$'),
+        'lightning_invoice': re.compile(r'^ln(?:bc|tb)[0-9a-z]+$', re.IGNORECASE),
+        'lightning_address': re.compile(r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$', re.IGNORECASE),
+        'private_key_wif': re.compile(r'^[5KL][1-9A-HJ-NP-Za-km-z]{50,51}$'),
+        'private_key_hex': re.compile(r'^[0-9a-fA-F]{64}$'),
+        'xpub': re.compile(r'^xpub[1-9A-HJ-NP-Za-km-z]{107}$'),
+        'xprv': re.compile(r'^xprv[1-9A-HJ-NP-Za-km-z]{107}$'),
+        'transaction_id': re.compile(r'^[0-9a-fA-F]{64}$'),
+    }
+    
     def __init__(self):
-        # Bitcoin address patterns
-        self.patterns = {
-            'legacy': re.compile(r'^[1][a-km-zA-HJ-NP-Z1-9]{25,34}$'),
-            'segwit_p2sh': re.compile(r'^[3][a-km-zA-HJ-NP-Z1-9]{25,34}$'),
-            'bech32': re.compile(r'^bc1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{6,87}$'),
-            'taproot': re.compile(r'^bc1p[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{58}$'),
-            'testnet_legacy': re.compile(r'^[mn2][a-km-zA-HJ-NP-Z1-9]{25,34}$'),
-            'testnet_bech32': re.compile(r'^tb1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{6,87}$'),
-            'lightning_invoice': re.compile(r'^ln(bc|tb)[0-9a-z]+$', re.IGNORECASE),
-            'lightning_address': re.compile(r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$', re.IGNORECASE),
-            'private_key_wif': re.compile(r'^[5KL][1-9A-HJ-NP-Za-km-z]{50,51}$'),
-            'private_key_hex': re.compile(r'^[0-9a-fA-F]{64}$'),
-            'xpub': re.compile(r'^xpub[1-9A-HJ-NP-Za-km-z]{107}$'),
-            'xprv': re.compile(r'^xprv[1-9A-HJ-NP-Za-km-z]{107}$'),
-            'transaction_id': re.compile(r'^[0-9a-fA-F]{64}$'),
-        }
-        
         # BIP39 seed phrase words (abbreviated list - full list has 2048 words)
         self.bip39_words = set([
             'abandon', 'ability', 'able', 'about', 'above', 'absent', 'absorb', 'abstract',
@@ -54,7 +58,7 @@ class BitcoinValidator:
             'risk_level': 'low'
         }
         
-        if not text:
+        if not text or not isinstance(text, str):
             return results
         
         # Split text into tokens for analysis
@@ -63,6 +67,10 @@ class BitcoinValidator:
         for token in tokens:
             token = token.strip('.,;:!?"\'')
             
+            # Cheap reject for tokens no pattern below can match
+            if token[:1] not in _TOKEN_FIRST_CHARS and '@' not in token:
+                continue
+            
             # Check Bitcoin addresses - order matters for correct detection
             if self.patterns['taproot'].match(token):
                 results['addresses'].append({
@@ -135,9 +143,12 @@ class BitcoinValidator:
                 })
                 results['risk_level'] = 'high'
         
-        # Check for seed phrases (12 or 24 words)
-        words = [w.lower().strip('.,;:!?"\'') for w in tokens]
-        if self._is_seed_phrase(words):
+        # Check for seed phrases (12 or 24 words); only build the word list
+        # when the token count can match, so long pastes skip it
+        words = None
+        if len(tokens) in (12, 24):
+            words = [w.lower().strip('.,;:!?"\'') for w in tokens]
+        if words and self._is_seed_phrase(words):
             results['seed_phrases'].append({
                 'value': ' '.join(words),
                 'word_count': len(words)
@@ -211,7 +222,7 @@ class BitcoinValidator:
         """Simplified bech32 validation for security detection"""
         # For security detection, pattern matching is sufficient
         # Avoids complex checksum algorithms that add attack surface
-        return (address.startswith('bc1') or address.startswith('tb1')) and \
+        return address.startswith(('bc1', 'tb1')) and \
                len(address) >= 14 and len(address) <= 74 and \
                all(c in 'qpzry9x8gf2tvdw0s3jn54khce6mua7l' for c in address[3:].lower())
     
@@ -5,27 +5,46 @@ Clipboard history management with encryption and expiration
 
 import json
 import time
+import heapq
+import threading
 import hashlib
 import base64
 from datetime import datetime, timedelta
 from collections import deque
-import keyring
-from cryptography.fernet import Fernet
 
 class ClipboardHistory:
+    # Seconds to wait before writing new items, so a burst of clipboard
+    # changes is encrypted and saved once
+    save_delay = 0.5
+    
     def __init__(self, max_items=50):
         self.max_items = max_items
         self.history = deque(maxlen=max_items)
         self.sensitive_items = {}  # Track expiration times
+        self._expiry_heap = []  # (expire_at, id) min-heap over sensitive_items
         self.pinned_items = []
+        self._search_text = {}  # id -> lowercased text and metadata for search
+        
+        # Imported here rather than at module level: cryptography loads the
+        # OpenSSL bindings, which dominates import time
+        from cryptography.fernet import Fernet
         self.encryption_key = self._get_or_create_key()
         self.cipher_suite = Fernet(self.encryption_key)
+        self._save_timer = None
+        # Guards _save_timer, _save_generation and each snapshot + write
+        self._save_lock = threading.Lock()
+        # Bumped whenever items are removed, so a save scheduled before the
+        # removal never writes them back
+        self._save_generation = 0
         
         # Load saved history
         self.load_history()
     
     def _get_or_create_key(self):
         """Get or create encryption key in macOS Keychain"""
+        import keyring
+        from cryptography.fernet import Fernet
+        
         service_name = "NoPrints"
         account_name = "encryption_key"
         
@@ -110,15 +129,18 @@ class ClipboardHistory:
                 expire_seconds = security.get('expire_seconds', 60)
                 item['expire_at'] = time.time() + expire_seconds
                 self.sensitive_items[item['id']] = item['expire_at']
+                heapq.heappush(self._expiry_heap, (item['expire_at'], item['id']))
             
             # Mark as sensitive
             item['is_sensitive'] = security.get('risk_level') in ['high', 'critical']
         
-        # Add to history
+        # Add to history; a full history drops its oldest item
+        if len(self.history) == self.max_items:
+            self._search_text.pop(self.history[-1]['id'], None)
         self.history.appendleft(item)
         
-        # Save to disk (encrypted)
-        self.save_history()
+        # Save to disk (encrypted) once the burst of changes settles
+        self._schedule_save()
         
         return item
     
@@ -163,15 +185,30 @@ class ClipboardHistory:
             if not include_sensitive and item.get('is_sensitive'):
                 continue
             
-            # Search in text
-            if query in item['text'].lower():
-                results.append(item)
-            # Search in metadata
-            elif any(query in str(v).lower() for v in item.get('metadata', {}).values()):
+            # Search in text and metadata
+            if query in self._get_search_text(item):
                 results.append(item)
         
         return results
     
+    def _get_search_text(self, item):
+        """Lowercased text and metadata values of an item, built once per item"""
+        search_text = self._search_text.get(item['id'])
+        if search_text is None:
+            parts = [item['text']]
+            parts.extend(str(v) for v in item.get('metadata', {}).values())
+            # NUL separators keep a query from matching across two fields
+            search_text = '\0'.join(parts).lower()
+            self._search_text[item['id']] = search_text
+        return search_text
+    
+    def _prune_search_text(self):
+        """Drop search text of items that have left the history"""
+        # It includes the security analysis, so it must not outlive the item
+        live_ids = {item['id'] for item in self.history}
+        self._search_text = {item_id: text for item_id, text in self._search_text.items()
+                             if item_id in live_ids}
+    
     def get_bitcoin_items(self):
         """Get all Bitcoin-related items"""
         bitcoin_items = []
@@ -190,6 +227,8 @@ class ClipboardHistory:
     
     def clear_sensitive(self):
         """Clear all sensitive items immediately"""
+        self._invalidate_pending_save()
+        
         # Create new history without sensitive items
         new_history = deque(maxlen=self.max_items)
         
@@ -199,33 +238,43 @@ class ClipboardHistory:
         
         self.history = new_history
         self.sensitive_items.clear()
+        self._expiry_heap.clear()
+        self._prune_search_text()
         self.save_history()
     
     def clear_all(self):
         """Clear all clipboard history and reset everything"""
+        self._invalidate_pending_save()
         self.history.clear()
         self.sensitive_items.clear()
+        self._expiry_heap.clear()
         self.pinned_items.clear()
+        self._search_text.clear()
         self.save_history()
     
     def clear_expired(self):
         """Remove expired items"""
         current_time = time.time()
-        expired_ids = []
+        expired_ids = set()
         
-        # Find expired items
-        for item_id, expire_time in list(self.sensitive_items.items()):
-            if expire_time <= current_time:
-                expired_ids.append(item_id)
+        # Pop expired entries; pinning or deleting an item only removes it
+        # from sensitive_items, so skip heap entries that no longer match
+        while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+            expire_time, item_id = heapq.heappop(self._expiry_heap)
+            if self.sensitive_items.get(item_id) == expire_time:
                 del self.sensitive_items[item_id]
+                expired_ids.add(item_id)
         
         # Remove from history
         if expired_ids:
+            self._invalidate_pending_save()
             new_history = deque(maxlen=self.max_items)
             for item in self.history:
                 if item['id'] not in expired_ids:
                     new_history.append(item)
             self.history = new_history
+            for item_id in expired_ids:
+                self._search_text.pop(item_id, None)
             self.save_history()
         
         return len(expired_ids)
@@ -247,23 +296,68 @@ class ClipboardHistory:
         """Delete specific item"""
         for item in list(self.history):
             if item['id'] == item_id:
+                self._invalidate_pending_save()
                 self.history.remove(item)
                 if item_id in self.sensitive_items:
                     del self.sensitive_items[item_id]
                 if item_id in self.pinned_items:
                     self.pinned_items.remove(item_id)
+                self._search_text.pop(item_id, None)
                 self.save_history()
                 return True
         return False
     
+    def flush(self):
+        """Write any pending changes to disk now"""
+        with self._save_lock:
+            pending = self._save_timer is not None
+        if pending:
+            self.save_history()
+    
+    def _schedule_save(self):
+        """Save after save_delay unless a save is already pending"""
+        with self._save_lock:
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay, self._save_if_current,
+                                                   args=(self._save_generation,))
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def _save_if_current(self, generation):
+        """Timer callback: save unless items were removed since it was scheduled"""
+        with self._save_lock:
+            if generation != self._save_generation:
+                return
+            self._save_timer = None
+            self._write_history()
+    
+    def _invalidate_pending_save(self):
+        """Drop any pending timed save; call before removing items"""
+        # Taking the lock also waits out a timed save already writing, so
+        # the caller's own save_history() is the last write
+        with self._save_lock:
+            self._save_generation += 1
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+    
     def save_history(self):
         """Save history to encrypted file"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._write_history()
+    
+    def _write_history(self):
+        """Snapshot and write the history; caller holds _save_lock"""
         try:
-            # Prepare data for saving
+            # Prepare data for saving; copies are taken in single C calls so
+            # main thread changes cannot land mid-snapshot
             save_data = {
                 'history': list(self.history)[:20],  # Save only last 20 for persistence
-                'pinned': self.pinned_items,
-                'sensitive_expiry': self.sensitive_items
+                'pinned': list(self.pinned_items),
+                'sensitive_expiry': dict(self.sensitive_items)
             }
             
             # Convert to JSON
@@ -301,6 +395,9 @@ class ClipboardHistory:
             self.history = deque(save_data.get('history', []), maxlen=self.max_items)
             self.pinned_items = save_data.get('pinned', [])
             self.sensitive_items = save_data.get('sensitive_expiry', {})
+            self._expiry_heap = [(expire_at, item_id)
+                                 for item_id, expire_at in self.sensitive_items.items()]
+            heapq.heapify(self._expiry_heap)
             
             # Clean expired items on load
             self.clear_expired()
@@ -356,12 +453,26 @@ class ClipboardHistory:
     
     def get_statistics(self):
         """Get history statistics"""
+        now = time.time()
+        sensitive_count = 0
+        bitcoin_count = 0
+        
+        # One pass over the history instead of one per counter
+        for item in self.history:
+            if item.get('is_sensitive'):
+                sensitive_count += 1
+            expire_at = item.get('expire_at')
+            if expire_at and now >= expire_at:
+                continue
+            if item.get('metadata', {}).get('security_analysis', {}).get('bitcoin'):
+                bitcoin_count += 1
+        
         stats = {
             'total_items': len(self.history),
-            'sensitive_items': sum(1 for i in self.history if i.get('is_sensitive')),
-            'bitcoin_items': len(self.get_bitcoin_items()),
+            'sensitive_items': sensitive_count,
+            'bitcoin_items': bitcoin_count,
             'pinned_items': len(self.pinned_items),
-            'expiring_soon': sum(1 for i in self.sensitive_items.values() 
-                               if i - time.time() < 30)
+            'expiring_soon': sum(1 for expire_at in self.sensitive_items.values()
+                               if expire_at - now < 30)
         }
         return stats
\ No newline at end of file
@@ -7,51 +7,62 @@ import re
 import hashlib
 import base64
 
+_BECH32_CHARSET = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+_HEX_DIGITS = '0123456789abcdefABCDEF'
+_RELAY_PREFIXES = ('wss://', 'ws://')
+
+# Nostr bech32 prefix -> allowed data length after the '1'
+_BECH32_DATA_LENGTHS = {
+    'npub': (58, 58),        # Public keys
+    'nsec': (58, 58),        # Private keys
+    'note': (58, 58),        # Note IDs
+    'nevent': (100, 200),    # Event IDs with additional data
+    'nprofile': (100, 300),  # Profile references with relay info
+    'nrelay': (50, 100),     # Relay URLs
+    'naddr': (100, 200),     # Addresses
+}
+
+def _is_hex64(token):
+    """True if token is exactly 64 hex digits, as a raw hex key is"""
+    # strip() leaves nothing behind only if every character is a hex digit
+    return len(token) == 64 and not token.strip(_HEX_DIGITS)
+
+def _bech32_type(token):
+    """Return the Nostr bech32 prefix token is encoded with, or None"""
+    if token[:1] != 'n':
+        return None
+    # The charset has no '1', so the first one is the separator
+    separator = token.find('1')
+    lengths = _BECH32_DATA_LENGTHS.get(token[:separator]) if separator > 0 else None
+    if lengths is None:
+        return None
+    data = token[separator + 1:]
+    # strip() leaves nothing behind only if every character is in the charset
+    if lengths[0] <= len(data) <= lengths[1] and not data.strip(_BECH32_CHARSET):
+        return token[:separator]
+    return None
+
 class NostrValidator:
-    def __init__(self):
-        # Nostr key patterns
-        self.patterns = {
-            # Nostr public keys (npub - bech32 encoded)
-            'npub': re.compile(r'^npub1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{58}$'),
-            
-            # Nostr private keys (nsec - bech32 encoded)
-            'nsec': re.compile(r'^nsec1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{58}$'),
-            
-            # Nostr note IDs (note - bech32 encoded)
-            'note': re.compile(r'^note1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{58}$'),
-            
-            # Nostr event IDs (nevent - bech32 encoded with additional data)
-            'nevent': re.compile(r'^nevent1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{100,200}$'),
-            
-            # Nostr profile references (nprofile - bech32 encoded with relay info)
-            'nprofile': re.compile(r'^nprofile1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{100,300}$'),
-            
-            # Nostr relay URLs (nrelay - bech32 encoded relay URL)
-            'nrelay': re.compile(r'^nrelay1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{50,100}$'),
-            
-            # Nostr addresses (naddr - bech32 encoded addresses)
-            'naddr': re.compile(r'^naddr1[qpzry9x8gf2tvdw0s3jn54khce6mua7l]{100,200}$'),
-            
-            # Raw hex public keys (64 characters)
-            'hex_pubkey': re.compile(r'^[0-9a-fA-F]{64}$'),
-            
-            # Raw hex private keys (64 characters) - same pattern but context matters
-            'hex_privkey': re.compile(r'^[0-9a-fA-F]{64}$'),
-            
-            # Nostr relay WebSocket URLs
-            'relay_ws': re.compile(r'^wss?://[a-zA-Z0-9.-]+(?::[0-9]+)?(?:/[^\s]*)?$'),
-            
-            # NIP-05 identifiers (like email format)
-            'nip05': re.compile(r'^[a-z0-9._-]+@[a-z0-9.-]+\.[a-z]{2,}$', re.IGNORECASE),
-            
-            # Lightning addresses in Nostr context
-            'lightning_nip57': re.compile(r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$', re.IGNORECASE),
-            
-            # Nostr Zap requests/receipts
-            'zap_request': re.compile(r'\"kind\":\s*9734'),
-            'zap_receipt': re.compile(r'\"kind\":\s*9735'),
-        }
+    # Nostr key patterns
+    patterns = {
+        # Bech32 keys and IDs are classified by _bech32_type with
+        # _BECH32_DATA_LENGTHS, and raw hex keys by _is_hex64
+        
+        # Nostr relay WebSocket URLs
+        'relay_ws': re.compile(r'^wss?://[a-zA-Z0-9.-]+(?::[0-9]+)?(?:/[^\s]*)?$'),
         
+        # NIP-05 identifiers (like email format)
+        'nip05': re.compile(r'^[a-z0-9._-]+@[a-z0-9.-]+\.[a-z]{2,}$', re.IGNORECASE),
+        
+        # Lightning addresses in Nostr context
+        'lightning_nip57': re.compile(r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$', re.IGNORECASE),
+        
+        # Nostr Zap requests/receipts
+        'zap_request': re.compile(r'\"kind\":\s*9734'),
+        'zap_receipt': re.compile(r'\"kind\":\s*9735'),
+    }
+    
+    def __init__(self):
         # Bech32 alphabet for Nostr
         self.bech32_alphabet = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
         
@@ -111,9 +122,10 @@ class NostrValidator:
         
         for token in tokens:
             token = token.strip('.,;:!?"\'()[]{}')
+            bech32_type = _bech32_type(token)
             
             # Check Nostr bech32 encoded keys and IDs
-            if self.patterns['nsec'].match(token):
+            if bech32_type == 'nsec':
                 results['private_keys'].append({
                     'value': token,
                     'type': 'nsec',
@@ -121,7 +133,7 @@ class NostrValidator:
                 })
                 results['risk_level'] = 'critical'
                 
-            elif self.patterns['npub'].match(token):
+            elif bech32_type == 'npub':
                 results['public_keys'].append({
                     'value': token,
                     'type': 'npub', 
@@ -129,7 +141,7 @@ class NostrValidator:
                 })
                 results['risk_level'] = max_risk(results['risk_level'], 'medium')
                 
-            elif self.patterns['note'].match(token):
+            elif bech32_type == 'note':
                 results['notes'].append({
                     'value': token,
                     'type': 'note',
@@ -137,7 +149,7 @@ class NostrValidator:
                 })
                 results['risk_level'] = max_risk(results['risk_level'], 'low')
                 
-            elif self.patterns['nevent'].match(token):
+            elif bech32_type == 'nevent':
                 results['events'].append({
                     'value': token,
                     'type': 'nevent',
@@ -145,7 +157,7 @@ class NostrValidator:
                 })
                 results['risk_level'] = max_risk(results['risk_level'], 'low')
                 
-            elif self.patterns['nprofile'].match(token):
+            elif bech32_type == 'nprofile':
                 results['public_keys'].append({
                     'value': token,
                     'type': 'nprofile',
@@ -153,14 +165,14 @@ class NostrValidator:
                 })
                 results['risk_level'] = max_risk(results['risk_level'], 'medium')
                 
-            elif self.patterns['nrelay'].match(token):
+            elif bech32_type == 'nrelay':
                 results['relays'].append({
                     'value': token,
                     'type': 'nrelay',
                     'encoding': 'bech32'
                 })
                 
-            elif self.patterns['naddr'].match(token):
+            elif bech32_type == 'naddr':
                 results['events'].append({
                     'value': token,
                     'type': 'naddr',
@@ -168,7 +180,7 @@ class NostrValidator:
                 })
                 
             # Check relay WebSocket URLs
-            elif self.patterns['relay_ws'].match(token):
+            elif token.startswith(_RELAY_PREFIXES) and self.patterns['relay_ws'].match(token):
                 results['relays'].append({
                     'value': token,
                     'type': 'websocket_url'
@@ -184,12 +196,12 @@ class NostrValidator:
                     })
         
         # Check for raw hex keys (need context to distinguish pub vs priv)
-        hex_tokens = [t for t in tokens if self.patterns['hex_pubkey'].match(t)]
+        hex_tokens = [t for t in tokens if _is_hex64(t)]
+        
+        # Try to determine if it's a private key based on context
+        context = text.lower() if hex_tokens else ''
         
         for hex_token in hex_tokens:
-            # Try to determine if it's a private key based on context
-            context = text.lower()
-            
             if any(indicator in context for indicator in ['private', 'secret', 'nsec', 'priv']):
                 results['private_keys'].append({
                     'value': hex_token,
@@ -212,15 +224,16 @@ class NostrValidator:
                 'content_preview': text[:100] + '...' if len(text) > 100 else text
             })
             
-            # Check for sensitive event types
-            if self.patterns['zap_request'].search(text):
+            # Check for sensitive event types; the kind number must appear
+            # literally, which rules out most events without a regex scan
+            if '9734' in text and self.patterns['zap_request'].search(text):
                 results['zaps'].append({
                     'type': 'zap_request',
                     'kind': 9734
                 })
                 results['risk_level'] = max_risk(results['risk_level'], 'medium')
                 
-            elif self.patterns['zap_receipt'].search(text):
+            elif '9735' in text and self.patterns['zap_receipt'].search(text):
                 results['zaps'].append({
                     'type': 'zap_receipt', 
                     'kind': 9735
@@ -238,15 +251,14 @@ class NostrValidator:
         Returns: (is_valid, key_type, encoding)
         """
         # Check bech32 encoded keys
-        for key_type, pattern in self.patterns.items():
-            if key_type in ['npub', 'nsec', 'note', 'nevent', 'nprofile', 'nrelay', 'naddr']:
-                if pattern.match(key):
-                    # Basic bech32 validation
-                    is_valid = self._validate_bech32(key)
-                    return is_valid, key_type, 'bech32'
+        key_type = _bech32_type(key)
+        if key_type:
+            # Basic bech32 validation
+            is_valid = self._validate_bech32(key)
+            return is_valid, key_type, 'bech32'
         
         # Check hex keys (basic length and character validation)
-        if self.patterns['hex_pubkey'].match(key):
+        if _is_hex64(key):
             return True, 'hex_key', 'hex'
         
         return False, None, None
@@ -264,7 +276,7 @@ class NostrValidator:
             
             # Check if all characters after separator are in bech32 alphabet
             data_part = data[separator_pos + 1:]
-            return all(c in self.bech32_alphabet for c in data_part)
+            return not data_part.strip(self.bech32_alphabet)
         except:
             return False
     
@@ -4,47 +4,80 @@ Security detection module for sensitive data in clipboard
 """
 
 import re
+import copy
+import hashlib
+from collections import OrderedDict
 from bitcoin_validator import BitcoinValidator
 from nostr_validator import NostrValidator
 
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Luhn value of a doubled digit: d * 2, minus 9 when that exceeds 9
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+# Shortest text each checked pattern category can match, so short
+# clipboard values skip regexes that cannot fit. A single cutoff for the
+# whole analysis would be unsafe: "pwd=x" is only 5 long.
+_MIN_MATCH_LENGTHS = {
+    'password': 5,
+    'credit_card': 13,
+    'api_key': 27,
+    'jwt': 11,
+    'ssh_key': 9,
+}
+
+# Pattern categories that can only match text containing one of these
+# literals; a substring test rules most text out before any regex runs
+_REQUIRED_LITERALS = {
+    'jwt': ('eyJ',),
+    'ssh_key': ('-----BEGIN ', 'ssh-'),
+}
+
+# Number of recent analyses kept for repeated clipboard values
+ANALYSIS_CACHE_SIZE = 256
+
+# Shorter texts are analyzed again instead: below this the digest and
+# copy cost more than the detection itself
+ANALYSIS_CACHE_MIN_LENGTH = 64
+
 class SecurityDetector:
+    # Sensitive data patterns
+    patterns = {
+        'password': [
+            re.compile(r'^(?=.*[A-Z])(?=.*[a-z])(?=.*\d)(?=.*[@$!%*?&#])[A-Za-z\d@$!%*?&#]{8,}$'),
+            re.compile(r'(?:password|passwd|pwd|pass)[\s:=]+\S+', re.IGNORECASE),
+        ],
+        'credit_card': [
+            re.compile(r'\b(?:\d[ -]*?){13,16}\b'),  # Basic credit card pattern
+            re.compile(r'\b[3-6]\d{3}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{3,4}\b'),
+        ],
+        'ssn': [
+            re.compile(r'\b\d{3}-\d{2}-\d{4}\b'),  # US SSN
+            re.compile(r'\b\d{9}\b'),  # SSN without dashes
+        ],
+        'api_key': [
+            re.compile(r'(?:api[_-]?key|apikey|api_token)[\s:=]+[\w-]{20,}', re.IGNORECASE),
+            re.compile(r'sk_live_[a-zA-Z0-9]{24,}'),  # Stripe
+            re.compile(r'pk_live_[a-zA-Z0-9]{24,}'),  # Stripe public
+            re.compile(r'[a-f0-9]{32}'),  # Generic 32-char hex (API keys)
+        ],
+        'jwt': [
+            re.compile(r'eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+'),
+        ],
+        'ssh_key': [
+            re.compile(r'-----BEGIN (?:RSA |DSA |EC |OPENSSH )?PRIVATE KEY-----'),
+            re.compile(r'ssh-(?:rsa|dss|ed25519) [A-Za-z0-9+/]+'),
+        ],
+        'aws_key': [
+            re.compile(r'AKIA[0-9A-Z]{16}'),  # AWS Access Key
+            re.compile(r'[a-zA-Z0-9/+=]{40}'),  # AWS Secret Key pattern
+        ],
+    }
+    
     def __init__(self):
         self.bitcoin_validator = BitcoinValidator()
         self.nostr_validator = NostrValidator()
         
-        # Sensitive data patterns
-        self.patterns = {
-            'password': [
-                re.compile(r'^(?=.*[A-Z])(?=.*[a-z])(?=.*\d)(?=.*[@$!%*?&#])[A-Za-z\d@$!%*?&#]{8,}$'),
-                re.compile(r'(?:password|passwd|pwd|pass)[\s:=]+\S+', re.IGNORECASE),
-            ],
-            'credit_card': [
-                re.compile(r'\b(?:\d[ -]*?){13,16}\b'),  # Basic credit card pattern
-                re.compile(r'\b[3-6]\d{3}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{3,4}\b'),
-            ],
-            'ssn': [
-                re.compile(r'\b\d{3}-\d{2}-\d{4}\b'),  # US SSN
-                re.compile(r'\b\d{9}\b'),  # SSN without dashes
-            ],
-            'api_key': [
-                re.compile(r'(?:api[_-]?key|apikey|api_token)[\s:=]+[\w-]{20,}', re.IGNORECASE),
-                re.compile(r'sk_live_[a-zA-Z0-9]{24,}'),  # Stripe
-                re.compile(r'pk_live_[a-zA-Z0-9]{24,}'),  # Stripe public
-                re.compile(r'[a-f0-9]{32}'),  # Generic 32-char hex (API keys)
-            ],
-            'jwt': [
-                re.compile(r'eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+'),
-            ],
-            'ssh_key': [
-                re.compile(r'-----BEGIN (?:RSA |DSA |EC |OPENSSH )?PRIVATE KEY-----'),
-                re.compile(r'ssh-(?:rsa|dss|ed25519) [A-Za-z0-9+/]+'),
-            ],
-            'aws_key': [
-                re.compile(r'AKIA[0-9A-Z]{16}'),  # AWS Access Key
-                re.compile(r'[a-zA-Z0-9/+=]{40}'),  # AWS Secret Key pattern
-            ],
-        }
-        
         # Excluded applications (won't store clipboard from these)
         self.excluded_apps = [
             '1Password',
@@ -65,12 +98,43 @@ class SecurityDetector:
             'Terminal',
             'iTerm',
         ]
+        
+        # Recent results with nothing detected, keyed by a digest of the
+        # text so cache keys never hold the clipboard contents themselves
+        self._analysis_cache = OrderedDict()
     
     def analyze_content(self, text, source_app=None):
         """
         Analyze clipboard content for sensitive data
         Returns: dict with detected items, risk level, and recommendations
         """
+        if not text or len(text) < ANALYSIS_CACHE_MIN_LENGTH:
+            return self._analyze_content(text, source_app)
+        
+        key = (hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest(),
+               source_app)
+        cached = self._analysis_cache.get(key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(key)
+            # Callers own their copy; the cached result is never handed out
+            return copy.deepcopy(cached)
+        
+        results = self._analyze_content(text, source_app)
+        # Anything that should expire holds detected values, which must
+        # leave memory with the expired history item, so only clean
+        # results are kept
+        if not results['should_expire']:
+            self._analysis_cache[key] = copy.deepcopy(results)
+            if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+        return results
+    
+    def clear_cache(self):
+        """Forget cached analyses"""
+        self._analysis_cache.clear()
+    
+    def _analyze_content(self, text, source_app=None):
+        """Run the full detection pipeline on text"""
         results = {
             'bitcoin': {},
             'nostr': {},
@@ -157,7 +221,7 @@ class SecurityDetector:
             results['expire_seconds'] = min(results['expire_seconds'] or 120, 120)
         
         # Check for passwords
-        for pattern in self.patterns['password']:
+        for pattern in self._patterns_for('password', text):
             if pattern.search(text):
                 results['passwords'].append({
                     'type': 'password',
@@ -172,11 +236,11 @@ class SecurityDetector:
                 break
         
         # Check for credit cards
-        for pattern in self.patterns['credit_card']:
+        for pattern in self._patterns_for('credit_card', text):
             matches = pattern.findall(text)
             for match in matches:
                 # Basic Luhn check for credit card
-                digits = re.sub(r'\D', '', match)
+                digits = _NON_DIGIT_RE.sub('', match)
                 if len(digits) >= 13 and len(digits) <= 19:
                     if self._luhn_check(digits):
                         results['credit_cards'].append({
@@ -191,7 +255,7 @@ class SecurityDetector:
                         results['warnings'].append('Credit card detected')
         
         # Check for API keys
-        for pattern in self.patterns['api_key']:
+        for pattern in self._patterns_for('api_key', text):
             if pattern.search(text):
                 results['api_keys'].append({
                     'type': 'api_key',
@@ -205,7 +269,7 @@ class SecurityDetector:
                 break
         
         # Check for JWT tokens
-        for pattern in self.patterns['jwt']:
+        for pattern in self._patterns_for('jwt', text):
             if pattern.search(text):
                 results['other_sensitive'].append({
                     'type': 'jwt_token'
@@ -217,7 +281,7 @@ class SecurityDetector:
                 results['warnings'].append('JWT token detected')
         
         # Check for SSH keys
-        for pattern in self.patterns['ssh_key']:
+        for pattern in self._patterns_for('ssh_key', text):
             if pattern.search(text):
                 results['other_sensitive'].append({
                     'type': 'ssh_key'
@@ -232,6 +296,15 @@ class SecurityDetector:
         
         return results
     
+    def _patterns_for(self, category, text):
+        """Patterns of a category worth running on text"""
+        if len(text) < _MIN_MATCH_LENGTHS.get(category, 0):
+            return ()
+        literals = _REQUIRED_LITERALS.get(category)
+        if literals and not any(literal in text for literal in literals):
+            return ()
+        return self.patterns[category]
+    
     def _risk_priority(self, level):
         """Return priority for risk level comparison"""
         priorities = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
@@ -240,17 +313,9 @@ class SecurityDetector:
     def _luhn_check(self, card_number):
         """Validate credit card number using Luhn algorithm"""
         try:
-            digits = [int(d) for d in card_number]
-            checksum = 0
-            
-            # Double every second digit from right
-            for i in range(len(digits) - 2, -1, -2):
-                doubled = digits[i] * 2
-                if doubled > 9:
-                    doubled = doubled - 9
-                digits[i] = doubled
-            
-            checksum = sum(digits)
+            # Every second digit from the right is doubled, via a lookup table
+            checksum = sum(map(int, card_number[-1::-2]))
+            checksum += sum(map(_LUHN_DOUBLED.__getitem__, map(int, card_number[-2::-2])))
             return checksum % 10 == 0
         except:
             return False
@@ -3,11 +3,42 @@
 Smart paste module for context-aware clipboard pasting
 """
 
+import re
 import subprocess
-from AppKit import NSWorkspace, NSRunningApplication
+from bitcoin_validator import BitcoinValidator
+
+# Digit, uppercase and lowercase somewhere in ASCII text, checked in one
+# pass; only exact for ASCII, see _looks_like_password
+_PASSWORD_RE = re.compile(r'(?=.*\d)(?=.*[A-Z])(?=.*[a-z])', re.DOTALL)
+
+# Formatting patterns used on every paste
+_WHITESPACE_RE = re.compile(r'\s+')
+_EXTRA_NEWLINES_RE = re.compile(r'\n{3,}')
+_SENTENCE_SPACING_RE = re.compile(r'([.!?])\s*([A-Z])')
+
+# Literal prefixes are checked with str.startswith rather than a regex
+_URL_PREFIXES = ('http://', 'https://')
+_STRUCTURED_PREFIXES = ('{', '[')
+
+# app category -> (recommended_format, suggestion, only when text is multi-line)
+_CONTEXT_RECOMMENDATIONS = {
+    'terminal': ('plain_text', "Will paste as plain text", False),
+    'spreadsheet': ('tabular', "Will format as table data", True),
+    'bitcoin_wallet': ('exact', "Exact copy - no modifications", False),
+}
+
+def _looks_like_password(text):
+    """True if text has a digit, an uppercase and a lowercase character"""
+    if text.isascii():
+        return _PASSWORD_RE.match(text) is not None
+    # isdigit/isupper/islower also cover non-Latin letters and digits
+    return (any(c.isdigit() for c in text) and any(c.isupper() for c in text)
+            and any(c.islower() for c in text))
 
 class SmartPaste:
     def __init__(self):
+        self.bitcoin_validator = BitcoinValidator()
+        
         # App categories for smart formatting
         self.app_categories = {
             'terminal': [
@@ -61,10 +92,20 @@ class SmartPaste:
             'bitcoin_wallet': 'exact_copy',
             'password_manager': 'exact_copy'
         }
+        
+        # Lowercased app name -> category, seeded with the known names and
+        # filled in as other apps are seen
+        self._category_cache = {
+            app.lower(): category
+            for category, apps in reversed(list(self.app_categories.items()))
+            for app in apps
+        }
     
     def get_active_app(self):
         """Get the currently active application"""
         try:
+            from AppKit import NSWorkspace
+            
             workspace = NSWorkspace.sharedWorkspace()
             active_app = workspace.activeApplication()
             
@@ -88,10 +129,16 @@ class SmartPaste:
     
     def _categorize_app(self, app_name):
         """Categorize app based on its name"""
-        for category, apps in self.app_categories.items():
-            if any(app.lower() in app_name.lower() for app in apps):
-                return category
-        return 'unknown'
+        name = app_name.lower()
+        category = self._category_cache.get(name)
+        if category is None:
+            category = 'unknown'
+            for candidate, apps in self.app_categories.items():
+                if any(app.lower() in name for app in apps):
+                    category = candidate
+                    break
+            self._category_cache[name] = category
+        return category
     
     def format_for_paste(self, text, target_app=None):
         """
@@ -141,8 +188,7 @@ class SmartPaste:
             text = text.replace(char, '')
         
         # Normalize whitespace
-        import re
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         text = text.strip()
         
         return text
@@ -174,14 +220,11 @@ class SmartPaste:
     
     def _format_for_email(self, text):
         """Format text for email clients"""
-        # Clean up excessive line breaks
-        import re
-        
         # Replace multiple newlines with double newline (paragraph break)
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = _EXTRA_NEWLINES_RE.sub('\n\n', text)
         
         # Ensure proper sentence spacing
-        text = re.sub(r'([.!?])\s*([A-Z])', r'\1  \2', text)
+        text = _SENTENCE_SPACING_RE.sub(r'\1  \2', text)
         
         return text
     
@@ -195,11 +238,11 @@ class SmartPaste:
             return self._preserve_code_format(text)
         
         # Check if it's structured data (JSON, XML, etc.)
-        if text.strip().startswith('{') or text.strip().startswith('['):
+        if text.strip().startswith(_STRUCTURED_PREFIXES):
             return self._preserve_code_format(text)  # Likely JSON
         
         # Check if it's a URL
-        if text.startswith('http://') or text.startswith('https://'):
+        if text.startswith(_URL_PREFIXES):
             return text.strip()  # Clean URL
         
         # Check if it's an email
@@ -268,9 +311,7 @@ class SmartPaste:
         app_name = target_app.get('name', 'Unknown')
         
         # Check for Bitcoin content going to non-wallet app
-        from bitcoin_validator import BitcoinValidator
-        validator = BitcoinValidator()
-        bitcoin_content = validator.detect_bitcoin_content(clipboard_text)
+        bitcoin_content = self.bitcoin_validator.detect_bitcoin_content(clipboard_text)
         
         if bitcoin_content['addresses'] or bitcoin_content['private_keys']:
             if app_category not in ['bitcoin_wallet', 'password_manager']:
@@ -280,19 +321,15 @@ class SmartPaste:
         # Check for password going to public app
         if app_category in ['browser', 'messaging', 'email']:
             # Simple password detection
-            if len(clipboard_text) > 8 and any(c.isdigit() for c in clipboard_text) \
-               and any(c.isupper() for c in clipboard_text) and any(c.islower() for c in clipboard_text):
+            if len(clipboard_text) > 8 and _looks_like_password(clipboard_text):
                 result['warnings'].append("⚠️ Possible password - pasting to public app")
         
         # Formatting recommendations
-        if app_category == 'terminal':
-            result['recommended_format'] = 'plain_text'
-            result['suggestions'].append("Will paste as plain text")
-        elif app_category == 'spreadsheet' and '\n' in clipboard_text:
-            result['recommended_format'] = 'tabular'
-            result['suggestions'].append("Will format as table data")
-        elif app_category == 'bitcoin_wallet':
-            result['recommended_format'] = 'exact'
-            result['suggestions'].append("Exact copy - no modifications")
+        recommendation = _CONTEXT_RECOMMENDATIONS.get(app_category)
+        if recommendation:
+            recommended_format, suggestion, needs_newline = recommendation
+            if not needs_newline or '\n' in clipboard_text:
+                result['recommended_format'] = recommended_format
+                result['suggestions'].append(suggestion)
         
         return result
\ No newline at end of file
@@ -3,11 +3,21 @@
 Test security detector functionality
 """
 
+import os
+import sys
+
 from security_detector import SecurityDetector
 
+# Per-case detail is printed for failing tests, or for every test with
+# TEST_VERBOSE=1 or -v
+_VERBOSE = os.environ.get('TEST_VERBOSE', '0') not in ('', '0') or '-v' in sys.argv[1:]
+
+# Built once and shared by every test
+_DETECTOR = SecurityDetector()
+
 def test_bitcoin_detection():
     """Test Bitcoin content detection"""
-    detector = SecurityDetector()
+    detector = _DETECTOR
     
     test_cases = [
         # Bitcoin addresses
@@ -35,31 +45,35 @@ def test_bitcoin_detection():
     passed = 0
     total = len(test_cases)
     
+    log = []
     for text, expected_risk in test_cases:
         result = detector.analyze_content(text)
         actual_risk = result['risk_level']
         
-        print(f"Text: {text[:40]}{'...' if len(text) > 40 else ''}")
-        print(f"Expected Risk: {expected_risk}, Actual: {actual_risk}")
+        log.append(f"Text: {text[:40]}{'...' if len(text) > 40 else ''}")
+        log.append(f"Expected Risk: {expected_risk}, Actual: {actual_risk}")
         
         if result['bitcoin']:
             bitcoin_data = result['bitcoin']
-            print(f"Bitcoin Data: {len(bitcoin_data['addresses'])} addresses, "
-                  f"{len(bitcoin_data['private_keys'])} keys, "
-                  f"{len(bitcoin_data['seed_phrases'])} phrases")
+            log.append(f"Bitcoin Data: {len(bitcoin_data['addresses'])} addresses, "
+                       f"{len(bitcoin_data['private_keys'])} keys, "
+                       f"{len(bitcoin_data['seed_phrases'])} phrases")
         
         if actual_risk == expected_risk:
-            print("✅ PASS\n")
+            log.append("✅ PASS\n")
             passed += 1
         else:
-            print("❌ FAIL\n")
+            log.append("❌ FAIL\n")
+    
+    if _VERBOSE or passed != total:
+        print('\n'.join(log))
     
     print(f"📊 Bitcoin Detection Results: {passed}/{total} passed")
     return passed == total
 
 def test_password_detection():
     """Test password detection"""
-    detector = SecurityDetector()
+    detector = _DETECTOR
     
     test_passwords = [
         # Strong passwords that should be detected
@@ -80,21 +94,25 @@ def test_password_detection():
     print("🔒 Testing Password Detection")
     print("=" * 50)
     
+    log = []
     for text in test_passwords:
         result = detector.analyze_content(text)
         
-        print(f"Text: {text}")
-        print(f"Risk Level: {result['risk_level']}")
-        print(f"Passwords Detected: {len(result['passwords'])}")
-        print(f"Should Expire: {result['should_expire']}")
-        print(f"Expire Time: {result['expire_seconds']}s")
-        print()
+        log.append(f"Text: {text}")
+        log.append(f"Risk Level: {result['risk_level']}")
+        log.append(f"Passwords Detected: {len(result['passwords'])}")
+        log.append(f"Should Expire: {result['should_expire']}")
+        log.append(f"Expire Time: {result['expire_seconds']}s")
+        log.append('')
+    
+    if _VERBOSE:
+        print('\n'.join(log))
     
     return True
 
 def test_credit_card_detection():
     """Test credit card detection"""
-    detector = SecurityDetector()
+    detector = _DETECTOR
     
     test_cards = [
         # Valid format credit cards (using test numbers that pass Luhn)
@@ -114,22 +132,26 @@ def test_credit_card_detection():
     print("💳 Testing Credit Card Detection")
     print("=" * 50)
     
+    log = []
     for text in test_cards:
         result = detector.analyze_content(text)
         
-        print(f"Text: {text}")
-        print(f"Risk Level: {result['risk_level']}")
-        print(f"Credit Cards: {len(result['credit_cards'])}")
+        log.append(f"Text: {text}")
+        log.append(f"Risk Level: {result['risk_level']}")
+        log.append(f"Credit Cards: {len(result['credit_cards'])}")
         if result['credit_cards']:
             for cc in result['credit_cards']:
-                print(f"  Masked: {cc['masked']}")
-        print()
+                log.append(f"  Masked: {cc['masked']}")
+        log.append('')
+    
+    if _VERBOSE:
+        print('\n'.join(log))
     
     return True
 
 def test_api_key_detection():
     """Test API key detection"""
-    detector = SecurityDetector()
+    detector = _DETECTOR
     
     test_keys = [
         # API key patterns (completely fake for testing)
@@ -149,19 +171,23 @@ def test_api_key_detection():
     print("🔐 Testing API Key Detection")
     print("=" * 50)
     
+    log = []
     for text in test_keys:
         result = detector.analyze_content(text)
         
-        print(f"Text: {text[:50]}{'...' if len(text) > 50 else ''}")
-        print(f"Risk Level: {result['risk_level']}")
-        print(f"API Keys: {len(result['api_keys'])}")
-        print()
+        log.append(f"Text: {text[:50]}{'...' if len(text) > 50 else ''}")
+        log.append(f"Risk Level: {result['risk_level']}")
+        log.append(f"API Keys: {len(result['api_keys'])}")
+        log.append('')
+    
+    if _VERBOSE:
+        print('\n'.join(log))
     
     return True
 
 def test_combined_detection():
     """Test detection of multiple sensitive data types"""
-    detector = SecurityDetector()
+    detector = _DETECTOR
     
     # Text with multiple sensitive items
     combined_text = """
@@ -176,29 +202,30 @@ def test_combined_detection():
     
     result = detector.analyze_content(combined_text)
     
-    print(f"Risk Level: {result['risk_level']}")
-    print(f"Risk Score: {result['risk_score']}")
-    print(f"Should Expire: {result['should_expire']}")
-    print(f"Expire Time: {result['expire_seconds']}s")
-    print(f"Should Blur: {result['should_blur']}")
-    print(f"Warnings: {result['warnings']}")
-    print()
-    
-    print("Detected Items:")
-    if result['bitcoin']['addresses']:
-        print(f"  Bitcoin Addresses: {len(result['bitcoin']['addresses'])}")
-    if result['passwords']:
-        print(f"  Passwords: {len(result['passwords'])}")
-    if result['credit_cards']:
-        print(f"  Credit Cards: {len(result['credit_cards'])}")
-    if result['api_keys']:
-        print(f"  API Keys: {len(result['api_keys'])}")
+    if _VERBOSE:
+        print(f"Risk Level: {result['risk_level']}")
+        print(f"Risk Score: {result['risk_score']}")
+        print(f"Should Expire: {result['should_expire']}")
+        print(f"Expire Time: {result['expire_seconds']}s")
+        print(f"Should Blur: {result['should_blur']}")
+        print(f"Warnings: {result['warnings']}")
+        print()
+        
+        print("Detected Items:")
+        if result['bitcoin']['addresses']:
+            print(f"  Bitcoin Addresses: {len(result['bitcoin']['addresses'])}")
+        if result['passwords']:
+            print(f"  Passwords: {len(result['passwords'])}")
+        if result['credit_cards']:
+            print(f"  Credit Cards: {len(result['credit_cards'])}")
+        if result['api_keys']:
+            print(f"  API Keys: {len(result['api_keys'])}")
     
     return True
 
 def test_display_formatting():
     """Test safe display formatting"""
-    detector = SecurityDetector()
+    detector = _DETECTOR
     
     test_cases = [
         "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa",  # Bitcoin address
@@ -211,14 +238,18 @@ def test_display_formatting():
     print("🎨 Testing Display Formatting")
     print("=" * 50)
     
+    log = []
     for text in test_cases:
         result = detector.analyze_content(text)
         display_text = detector.get_display_text(text, result)
         
-        print(f"Original: {text}")
-        print(f"Display:  {display_text}")
-        print(f"Blurred:  {result['should_blur']}")
-        print()
+        log.append(f"Original: {text}")
+        log.append(f"Display:  {display_text}")
+        log.append(f"Blurred:  {result['should_blur']}")
+        log.append('')
+    
+    if _VERBOSE:
+        print('\n'.join(log))
     
     return True
 